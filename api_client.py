@@ -0,0 +1,149 @@
+import base64
+import threading
+from urllib.parse import urlsplit, urlunsplit
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+# The PNG is only a transport format over localhost/LAN, so favour encode
+# speed over compression ratio
+PNG_COMPRESSION_LEVEL = 1
+
+# Path of the prediction route and the health route that sits beside it
+PREDICT_PATH = '/predict_base64'
+HEALTH_PATH = '/health'
+
+# Class order of the model's 'probabilities' output
+HEMORRHAGE_CLASSES = (
+    'Epidural',
+    'Subdural',
+    'Subarachnoid',
+    'Intraventricular',
+    'Intracerebral'
+)
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def convert_image_to_base64(image_array):
+    """
+    Convert numpy uint8 image array to base64 for API transmission
+    
+    Sends a uint8 PNG; dequantization is the server's responsibility.
+    """
+    import cv2
+    
+    if image_array.dtype != np.uint8:
+        raise TypeError(f"Expected a uint8 image, got {image_array.dtype}")
+    
+    # Resize and encode with OpenCV, skipping the ndarray -> PIL round trip
+    resized = cv2.resize(image_array, (224, 224), interpolation=cv2.INTER_AREA)
+    if resized.ndim == 3:
+        # The pipeline is RGB but cv2.imencode expects BGR
+        resized = cv2.cvtColor(resized, cv2.COLOR_RGB2BGR)
+    ok, buffered = cv2.imencode('.png', resized, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION_LEVEL])
+    if not ok:
+        raise ValueError("Could not encode image as PNG")
+    
+    return base64.b64encode(buffered).decode('ascii')
+
+def get_session():
+    """
+    Keep-alive session so repeated analyses reuse the same connection
+    """
+    global _SESSION
+    # The warm-up thread and the script thread may both get here first
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            _SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2, max_retries=1)
+            _SESSION.mount('http://', adapter)
+            _SESSION.mount('https://', adapter)
+    return _SESSION
+
+def get_health_url(api_endpoint):
+    """
+    Derive the health URL from the prediction endpoint, or None if it can't be
+    """
+    parts = urlsplit(api_endpoint)
+    if not parts.path.endswith(PREDICT_PATH):
+        return None
+    path = parts.path[:-len(PREDICT_PATH)] + HEALTH_PATH
+    return urlunsplit(parts._replace(path=path, query='', fragment=''))
+
+def warm_up_ai_model(health_url):
+    """
+    Open a connection to the model server ahead of the real request
+    """
+    import requests
+    
+    try:
+        get_session().get(health_url, timeout=2)
+    except requests.exceptions.RequestException:
+        # Best effort only; send_to_ai_model reports real failures
+        pass
+
+def start_warm_up(api_endpoint):
+    """
+    Warm up the model connection in the background without waiting for it
+    """
+    health_url = get_health_url(api_endpoint)
+    if health_url is None:
+        # Never guess; a GET on the predict route itself is not a health check
+        return
+    threading.Thread(target=warm_up_ai_model, args=(health_url,), daemon=True).start()
+
+def send_to_ai_model(base64_image, api_endpoint):
+    """
+    Send image to FastAPI model
+    """
+    import requests
+    
+    try:
+        response = get_session().post(
+            api_endpoint,
+            json={"image": base64_image},
+            timeout=(3.05, 30)
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            st.error(f"Model API error: {response.status_code}")
+            return None
+    
+    except requests.exceptions.RequestException as e:
+        st.error(f"Network error: {e}")
+        return None
+
+def display_results(ai_results):
+    """
+    Create visualization of results
+    """
+    # Results bar chart, rendered client-side in a single element
+    probabilities = ai_results.get('probabilities', [0]*len(HEMORRHAGE_CLASSES))
+    if len(probabilities) == len(HEMORRHAGE_CLASSES):
+        st.bar_chart(pd.Series(probabilities, index=HEMORRHAGE_CLASSES, name='Probability'))
+    else:
+        st.error(
+            f"Model API returned {len(probabilities)} probabilities, "
+            f"expected {len(HEMORRHAGE_CLASSES)}"
+        )
+    
+    # Prediction summary
+    st.success(f"Predicted Hemorrhage Type: {ai_results.get('predicted_type')}")
+    st.info(f"Confidence: {ai_results.get('confidence', 0)*100:.2f}%")
+
+def analyze_scan(image_array, api_endpoint):
+    """
+    Send a normalized scan to the model API and display its prediction
+    """
+    with st.spinner('AI is analyzing the brain scan...'):
+        base64_image = convert_image_to_base64(image_array)
+        ai_results = send_to_ai_model(base64_image, api_endpoint)
+    
+    if ai_results:
+        display_results(ai_results)
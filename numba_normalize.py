@@ -0,0 +1,28 @@
+import threading
+import numpy as np
+from numba import njit, prange
+
+# Streamlit calls in from one thread per session, and numba's fallback
+# workqueue threading layer aborts the process on concurrent parallel calls
+_KERNEL_LOCK = threading.Lock()
+
+# No fastmath: reassociating the float32 steps would make results differ
+# from the NumPy path in normalize_to_uint8
+@njit(parallel=True, cache=True)
+def _normalize_kernel(src, out, lo, hi, scale):
+    # Fused clip, shift, scale and cast in a single parallel pass
+    for i in prange(src.size):
+        v = min(max(np.float32(src[i]), lo), hi)
+        out[i] = np.uint8(np.rint((v - lo) * scale))
+
+def normalize_parallel(image_array, lo, hi, scale):
+    """
+    Clip to [lo, hi] and scale to uint8 across all cores
+
+    lo, hi and scale must be float32, as returned by percentile_window.
+    """
+    src = np.ascontiguousarray(image_array)
+    out = np.empty(src.shape, dtype=np.uint8)
+    with _KERNEL_LOCK:
+        _normalize_kernel(src.reshape(-1), out.reshape(-1), lo, hi, scale)
+    return out
@@ -1,61 +1,248 @@
+import os
+import shutil
+import tempfile
 import streamlit as st
-import pydicom
 import numpy as np
-import matplotlib.pyplot as plt
-import time
 import random
 
-def load_dicom_image(dicom_file):
+# Only the elements needed to build pixel_array are parsed eagerly
+PIXEL_TAGS = [
+    'PixelData', 'Rows', 'Columns', 'BitsAllocated', 'BitsStored',
+    'HighBit', 'PixelRepresentation', 'SamplesPerPixel',
+    'PlanarConfiguration', 'PhotometricInterpretation', 'NumberOfFrames',
+    'TransferSyntaxUID'
+]
+
+HEMORRHAGE_TYPES = (
+    'Epidural Hemorrhage',
+    'Subdural Hemorrhage',
+    'Subarachnoid Hemorrhage',
+    'Intraventricular Hemorrhage',
+    'Intracerebral Hemorrhage'
+)
+
+# Decoders tried first for compressed transfer syntaxes, fastest first
+PREFERRED_DECODERS = ('pylibjpeg', 'gdcm')
+
+# Raw dtypes for uncompressed little-endian pixel data,
+# keyed by (BitsAllocated, PixelRepresentation)
+RAW_PIXEL_DTYPES = {
+    (8, 0): np.dtype('u1'),
+    (8, 1): np.dtype('i1'),
+    (16, 0): np.dtype('<u2'),
+    (16, 1): np.dtype('<i2'),
+}
+
+# Uploads are copied to disk in chunks of this many bytes
+SPOOL_CHUNK_SIZE = 1 << 20
+
+# Longest edge, in pixels, that is worth sending to the browser
+MAX_DISPLAY_SIZE = 1024
+
+# Percentiles are estimated from every Nth pixel on large arrays
+PERCENTILE_SAMPLE_STRIDE = 16
+PERCENTILE_SAMPLE_MIN_SIZE = 1_000_000
+
+# Arrays above this many pixels use the parallel numba kernel when available
+NUMBA_MIN_SIZE = 1_000_000
+
+def percentile_window(image_array):
+    """
+    Return float32 (lo, hi, scale) mapping the 1st-99th percentiles to 0-255
+    """
+    flat = image_array.ravel()
+    if flat.size > PERCENTILE_SAMPLE_MIN_SIZE:
+        # A strided sample is plenty to estimate the percentiles
+        flat = flat[::PERCENTILE_SAMPLE_STRIDE]
+    lo, hi = np.percentile(flat, [1.0, 99.0]).astype(np.float32)
+    # Flat slices (hi == lo) would otherwise divide by zero
+    scale = np.float32(255.0) / max(hi - lo, np.float32(1.0))
+    return lo, hi, scale
+
+def normalize_to_uint8(image_array):
+    """
+    Scale a pixel array to 0-255, clipping to the 1st-99th percentile range
+    """
+    lo, hi, scale = percentile_window(image_array)
+    
+    if image_array.size > NUMBA_MIN_SIZE:
+        try:
+            from numba_normalize import normalize_parallel
+        except ImportError:
+            # numba is optional; NumPy handles every size without it
+            pass
+        else:
+            return normalize_parallel(image_array, lo, hi, scale)
+    
+    # Clip straight into a float32 buffer; no float64 temporaries. The numba
+    # kernel does the same float32 steps so both paths agree exactly
+    buf = np.empty(image_array.shape, dtype=np.float32)
+    np.clip(image_array, lo, hi, out=buf)
+    buf -= lo
+    buf *= scale
+    # Round rather than truncate so hi lands on 255, not 254
+    np.rint(buf, out=buf)
+    return buf.astype(np.uint8)
+
+def spool_upload(uploaded_file):
+    """
+    Copy an uploaded file to a temporary .dcm file and return its path
+    """
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.dcm', delete=False) as tmp:
+        try:
+            shutil.copyfileobj(uploaded_file, tmp, length=SPOOL_CHUNK_SIZE)
+        except BaseException:
+            # The caller never sees the path, so clean it up here
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return tmp.name
+
+def decode_pixel_array(dicom_data):
+    """
+    Decode pixel data, preferring the fastest installed decoder when compressed
+    """
+    if dicom_data.file_meta.TransferSyntaxUID.is_compressed:
+        for plugin in PREFERRED_DECODERS:
+            try:
+                dicom_data.pixel_array_options(decoding_plugin=plugin)
+                return dicom_data.pixel_array
+            except (RuntimeError, ValueError):
+                # Plugin not installed or unable to handle this syntax
+                continue
+        dicom_data.pixel_array_options(decoding_plugin='')
+    
+    return dicom_data.pixel_array
+
+def map_raw_pixels(dicom_data, path):
+    """
+    Memory-map uncompressed little-endian pixel data, or return None if unsupported
+    """
+    from pydicom.uid import ExplicitVRLittleEndian, ImplicitVRLittleEndian
+    
+    if dicom_data.file_meta.TransferSyntaxUID not in (ExplicitVRLittleEndian, ImplicitVRLittleEndian):
+        return None
+    
+    dtype = RAW_PIXEL_DTYPES.get((dicom_data.BitsAllocated, dicom_data.PixelRepresentation))
+    if dtype is None or dicom_data.get('SamplesPerPixel', 1) != 1:
+        return None
+    # Values narrower than their container need masking or sign extension
+    if dicom_data.BitsStored != dicom_data.BitsAllocated:
+        return None
+    
+    frames = int(dicom_data.get('NumberOfFrames', 1) or 1)
+    shape = (dicom_data.Rows, dicom_data.Columns)
+    if frames > 1:
+        shape = (frames,) + shape
+    
+    pixel_data = dicom_data.get_item(0x7FE00010, keep_deferred=True)
+    if pixel_data.length < np.prod(shape) * dtype.itemsize:
+        return None
+    
+    # View the raw values in place instead of copying them
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode='r',
+        offset=pixel_data.value_tell,
+        shape=shape
+    )
+
+def read_pixel_array(dicom_data, path):
+    """
+    Return the pixel data, memory-mapping it straight from disk when possible
+    """
+    image_array = map_raw_pixels(dicom_data, path)
+    if image_array is None:
+        image_array = decode_pixel_array(dicom_data)
+    return image_array
+
+def decode_dicom_file(path):
+    """
+    Read a DICOM file from disk and return its normalized image
+    """
+    import pydicom
+    
+    # Read only pixel-related elements, deferring large values
+    dicom_data = pydicom.dcmread(
+        path, defer_size="1 KB", specific_tags=PIXEL_TAGS
+    )
+    
+    # Convert to numpy array and normalize
+    try:
+        image_array = read_pixel_array(dicom_data, path)
+    except AttributeError:
+        # Some element pixel_array needs was skipped, read everything
+        dicom_data = pydicom.dcmread(path, defer_size="1 KB")
+        image_array = read_pixel_array(dicom_data, path)
+    
+    # Multi-frame data is (frames, rows, cols, ...); show the middle frame
+    frames = int(dicom_data.get('NumberOfFrames', 1) or 1)
+    if frames > 1:
+        image_array = image_array[frames // 2]
+    
+    return normalize_to_uint8(image_array)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_dicom_image(file_id, _uploaded_file):
     """
-    Load and convert DICOM file to displayable image
+    Load and convert an uploaded DICOM file to displayable image (cached per upload)
     """
+    path = None
     try:
-        # Read DICOM file
-        dicom_data = pydicom.dcmread(dicom_file)
-        
-        # Convert to numpy array and normalize
-        image_array = dicom_data.pixel_array
-        image_normalized = ((image_array - image_array.min()) / 
-                            (image_array.max() - image_array.min()) * 255).astype(np.uint8)
-        
-        return image_normalized
+        path = spool_upload(_uploaded_file)
+        return decode_dicom_file(path)
     except Exception as e:
         st.error(f"Error processing DICOM file: {e}")
         return None
+    finally:
+        if path is not None:
+            os.unlink(path)
 
 def display_dicom_image(image_array):
     """
-    Create visualization of DICOM image
+    Display DICOM image directly with st.image
     """
-    fig, ax = plt.subplots(figsize=(10, 10))
-    
-    # Display image
-    ax.imshow(image_array, cmap='gray')
-    ax.set_title('DICOM Brain CT Scan')
-    ax.axis('off')
+    h, w = image_array.shape[:2]
+    if max(h, w) > MAX_DISPLAY_SIZE:
+        import cv2
+        
+        # Downsample once so the browser isn't sent more pixels than it shows
+        scale = MAX_DISPLAY_SIZE / max(h, w)
+        image_array = cv2.resize(
+            image_array,
+            (max(int(w * scale), 1), max(int(h * scale), 1)),
+            interpolation=cv2.INTER_AREA
+        )
     
-    plt.tight_layout()
-    st.pyplot(fig)
+    st.image(
+        image_array,
+        caption='DICOM Brain CT Scan',
+        width='stretch',
+        clamp=True
+    )
+
+def get_api_endpoint():
+    """
+    Return the configured model API endpoint, or None to simulate predictions
+    """
+    try:
+        return st.secrets.get("API_ENDPOINT")
+    except FileNotFoundError:
+        # No secrets.toml at all
+        return None
 
 def simulate_prediction():
     """
-    Simulate a prediction process with a spinner and random result
+    Simulate a prediction with a random result
     """
-    hemorrhage_types = [
-        'Epidural Hemorrhage', 
-        'Subdural Hemorrhage', 
-        'Subarachnoid Hemorrhage', 
-        'Intraventricular Hemorrhage', 
-        'Intracerebral Hemorrhage'
-    ]
+    choice = random.choice
+    uniform = random.uniform
     
-    with st.spinner('AI is analyzing the brain scan...'):
-        # Simulate processing time
-        time.sleep(3)
-        
-        # Randomly select a hemorrhage type
-        predicted_type = random.choice(hemorrhage_types)
-        confidence = round(random.uniform(0.6, 0.95), 2)
+    # Randomly select a hemorrhage type
+    predicted_type = choice(HEMORRHAGE_TYPES)
+    confidence = round(uniform(0.6, 0.95), 2)
     
     # Display simulated results
     st.success(f"Predicted Hemorrhage Type: {predicted_type}")
@@ -86,23 +273,34 @@ def main():
     )
     
     # Image display and prediction section
+    api_endpoint = get_api_endpoint()
     if uploaded_file is not None:
+        # Open the model connection while the scan decodes, once per upload
+        if api_endpoint and st.session_state.get('warmed_up_file_id') != uploaded_file.file_id:
+            from api_client import start_warm_up
+            start_warm_up(api_endpoint)
+            st.session_state['warmed_up_file_id'] = uploaded_file.file_id
+        
         # Create two columns for layout
         col1, col2 = st.columns([2, 1])
         
         with col1:
             # Load and display DICOM image
-            dicom_image = load_dicom_image(uploaded_file)
+            dicom_image = load_dicom_image(uploaded_file.file_id, uploaded_file)
             
             if dicom_image is not None:
                 st.subheader("📸 Brain CT Scan")
                 display_dicom_image(dicom_image)
         
         with col2:
-            # Prediction simulation
+            # Real model when an endpoint is configured, simulation otherwise
             st.subheader("🤖 AI Analysis")
             if st.button("Analyze Scan"):
-                simulate_prediction()
+                if api_endpoint and dicom_image is not None:
+                    from api_client import analyze_scan
+                    analyze_scan(dicom_image, api_endpoint)
+                else:
+                    simulate_prediction()
 
     # Additional information
     st.markdown("---")
@@ -115,149 +313,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# import streamlit as st
-# import requests
-# import io
-# import base64
-# import pydicom
-# import numpy as np
-# import matplotlib.pyplot as plt
-# from PIL import Image
-
-# # Configuration
-# API_ENDPOINT = st.secrets.get("API_ENDPOINT", "http://localhost:8000/predict_base64")
-
-# def load_dicom_image(dicom_file):
-#     """
-#     Load and convert DICOM file to displayable image
-#     """
-#     try:
-#         dicom_data = pydicom.dcmread(dicom_file)
-#         image_array = dicom_data.pixel_array
-        
-#         # Normalize image
-#         image_normalized = ((image_array - image_array.min()) / 
-#                             (image_array.max() - image_array.min()) * 255).astype(np.uint8)
-        
-#         return image_normalized
-#     except Exception as e:
-#         st.error(f"Error processing DICOM file: {e}")
-#         return None
-
-# def convert_image_to_base64(image_array):
-#     """
-#     Convert numpy image array to base64 for API transmission
-#     """
-#     pil_image = Image.fromarray(image_array)
-#     pil_image_resized = pil_image.resize((224, 224))
-    
-#     buffered = io.BytesIO()
-#     pil_image_resized.save(buffered, format="PNG")
-    
-#     return base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-# def send_to_ai_model(base64_image):
-#     """
-#     Send image to FastAPI model
-#     """
-#     try:
-#         response = requests.post(
-#             API_ENDPOINT, 
-#             json={"image": base64_image},
-#             headers={"Content-Type": "application/json"}
-#         )
-        
-#         if response.status_code == 200:
-#             return response.json()
-#         else:
-#             st.error(f"Model API error: {response.status_code}")
-#             return None
-    
-#     except requests.exceptions.RequestException as e:
-#         st.error(f"Network error: {e}")
-#         return None
-
-# def display_results(original_image, ai_results):
-#     """
-#     Create visualization of results
-#     """
-#     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 6))
-    
-#     # Original image
-#     ax1.imshow(original_image, cmap='gray')
-#     ax1.set_title('Original DICOM Image')
-#     ax1.axis('off')
-    
-#     # Results bar chart
-#     if ai_results:
-#         hemorrhage_types = [
-#             'Epidural', 
-#             'Subdural', 
-#             'Subarachnoid', 
-#             'Intraventricular', 
-#             'Intracerebral'
-#         ]
-#         probabilities = ai_results.get('probabilities', [0]*len(hemorrhage_types))
-        
-#         ax2.bar(hemorrhage_types, probabilities)
-#         ax2.set_title('Hemorrhage Type Probabilities')
-#         ax2.set_ylabel('Probability')
-#         ax2.set_xticklabels(hemorrhage_types, rotation=45)
-    
-#     plt.tight_layout()
-#     st.pyplot(fig)
-
-# def main():
-#     st.title("🧠 Brain Hemorrhage Classifier")
-    
-#     # Sidebar 
-#     st.sidebar.header("Instructions")
-#     st.sidebar.info(
-#         "1. Upload a Brain CT Scan (.dcm file)\n"
-#         "2. Wait for AI analysis\n"
-#         "3. View hemorrhage type probabilities"
-#     )
-    
-#     # File uploader
-#     uploaded_file = st.file_uploader(
-#         "Upload DICOM Brain CT Scan", 
-#         type=['dcm'], 
-#         help="Upload a DICOM format brain CT scan"
-#     )
-    
-#     if uploaded_file is not None:
-#         with st.spinner('Processing image...'):
-#             # Load DICOM image
-#             dicom_image = load_dicom_image(uploaded_file)
-            
-#             if dicom_image is not None:
-#                 # Convert to base64
-#                 base64_image = convert_image_to_base64(dicom_image)
-                
-#                 # Send to AI model
-#                 ai_results = send_to_ai_model(base64_image)
-                
-#                 if ai_results:
-#                     # Display results
-#                     display_results(dicom_image, ai_results)
-                    
-#                     # Detailed probabilities
-#                     st.subheader("Detailed Analysis")
-#                     hemorrhage_types = [
-#                         'Epidural', 
-#                         'Subdural', 
-#                         'Subarachnoid', 
-#                         'Intraventricular', 
-#                         'Intracerebral'
-#                     ]
-                    
-#                     for type, prob in zip(hemorrhage_types, ai_results.get('probabilities', [0]*5)):
-#                         st.metric(label=type, value=f"{prob*100:.2f}%")
-                    
-#                     # Prediction summary
-#                     st.success(f"Predicted Hemorrhage Type: {ai_results.get('predicted_type')}")
-#                     st.info(f"Confidence: {ai_results.get('confidence', 0)*100:.2f}%")
-
-# if __name__ == "__main__":
-#     main()
\ No newline at end of file
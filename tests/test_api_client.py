@@ -0,0 +1,73 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import api_client
+
+
+def decode_png(base64_image):
+    from PIL import Image
+
+    return np.asarray(Image.open(io.BytesIO(base64.b64decode(base64_image))))
+
+
+@pytest.mark.parametrize("api_endpoint, health_url", [
+    ("http://localhost:8000/predict_base64", "http://localhost:8000/health"),
+    ("https://models.example/api/v1/predict_base64", "https://models.example/api/v1/health"),
+    ("http://localhost:8000/predict_base64?token=abc#frag", "http://localhost:8000/health"),
+    ("http://localhost:8000/predict", None),
+    ("http://localhost:8000/predict_base64/", None),
+    ("http://localhost:8000/", None),
+])
+def test_get_health_url(api_endpoint, health_url):
+    assert api_client.get_health_url(api_endpoint) == health_url
+
+
+def results_app(probabilities):
+    from api_client import display_results
+
+    display_results({
+        'probabilities': probabilities,
+        'predicted_type': 'Subdural',
+        'confidence': 0.5
+    })
+
+
+def run_display_results(probabilities):
+    return AppTest.from_function(results_app, args=(probabilities,)).run()
+
+
+def test_display_results_charts_probabilities():
+    at = run_display_results([0.1, 0.6, 0.1, 0.1, 0.1])
+    assert not at.exception
+    assert not at.error
+    assert len(at.get("vega_lite_chart")) == 1
+    assert at.success[0].value == "Predicted Hemorrhage Type: Subdural"
+
+
+def test_display_results_reports_length_mismatch():
+    at = run_display_results([0.4, 0.6])
+    assert not at.exception
+    assert at.error[0].value == "Model API returned 2 probabilities, expected 5"
+    assert not at.get("vega_lite_chart")
+    assert at.success[0].value == "Predicted Hemorrhage Type: Subdural"
+
+
+def test_convert_image_to_base64_keeps_rgb_order():
+    pytest.importorskip("cv2")
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[..., 0] = 255
+
+    decoded = decode_png(api_client.convert_image_to_base64(image))
+    assert decoded.shape == (224, 224, 3)
+    assert (decoded[..., 0] == 255).all()
+    assert (decoded[..., 2] == 0).all()
+
+
+def test_convert_image_to_base64_rejects_non_uint8():
+    pytest.importorskip("cv2")
+    with pytest.raises(TypeError):
+        api_client.convert_image_to_base64(np.zeros((64, 64), dtype=np.float32))
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+import streamlit_app
+
+
+def write_dicom(path, pixels, bits_stored, signed=False):
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = '1.2.840.10008.5.1.4.1.1.2'
+    file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    ds = Dataset()
+    ds.file_meta = file_meta
+    ds.SOPClassUID = file_meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.Rows, ds.Columns = pixels.shape[-2:]
+    if pixels.ndim == 3:
+        ds.NumberOfFrames = pixels.shape[0]
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = 'MONOCHROME2'
+    ds.BitsAllocated = pixels.dtype.itemsize * 8
+    ds.BitsStored = bits_stored
+    ds.HighBit = bits_stored - 1
+    ds.PixelRepresentation = int(signed)
+    ds.PixelData = pixels.tobytes()
+    ds.save_as(path, enforce_file_format=True)
+    return path
+
+
+def expected_image(path):
+    return streamlit_app.normalize_to_uint8(pydicom.dcmread(path).pixel_array)
+
+
+@pytest.mark.parametrize("dtype, bits_stored", [
+    (np.uint16, 16),
+    (np.int16, 16),
+    (np.uint8, 8),
+])
+def test_mapped_pixels_match_pixel_array(tmp_path, dtype, bits_stored):
+    rng = np.random.default_rng(0)
+    info = np.iinfo(dtype)
+    pixels = rng.integers(info.min, info.max, size=(64, 64), endpoint=True).astype(dtype)
+    path = write_dicom(tmp_path / "full.dcm", pixels, bits_stored, signed=info.min < 0)
+
+    ds = pydicom.dcmread(path, defer_size="1 KB", specific_tags=streamlit_app.PIXEL_TAGS)
+    assert streamlit_app.map_raw_pixels(ds, path) is not None
+    np.testing.assert_array_equal(streamlit_app.decode_dicom_file(path), expected_image(path))
+
+
+def test_narrow_stored_bits_are_masked(tmp_path):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 4095, size=(64, 64), endpoint=True).astype(np.uint16)
+    # Overlay-style junk in the unused high bits
+    pixels |= rng.integers(0, 15, size=pixels.shape, endpoint=True).astype(np.uint16) << 12
+    path = write_dicom(tmp_path / "12bit.dcm", pixels, bits_stored=12)
+
+    ds = pydicom.dcmread(path, defer_size="1 KB", specific_tags=streamlit_app.PIXEL_TAGS)
+    assert streamlit_app.map_raw_pixels(ds, path) is None
+    np.testing.assert_array_equal(streamlit_app.decode_dicom_file(path), expected_image(path))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_numba_kernel_matches_numpy(seed):
+    numba_normalize = pytest.importorskip("numba_normalize")
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 65535, size=(128, 128), endpoint=True).astype(np.uint16)
+
+    # Small arrays take the NumPy path in normalize_to_uint8
+    np.testing.assert_array_equal(
+        numba_normalize.normalize_parallel(pixels, *streamlit_app.percentile_window(pixels)),
+        streamlit_app.normalize_to_uint8(pixels)
+    )
+
+
+def test_numba_kernel_matches_numpy_at_window_edges():
+    numba_normalize = pytest.importorskip("numba_normalize")
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(100, 4000, size=(128, 128), endpoint=True).astype(np.uint16)
+    # Enough pixels pinned to both ends that the percentiles land on them exactly
+    pixels.flat[:1000] = 4095
+    pixels.flat[1000:2000] = 0
+    lo, hi, scale = streamlit_app.percentile_window(pixels)
+    assert (lo, hi) == (0, 4095)
+
+    expected = streamlit_app.normalize_to_uint8(pixels)
+    np.testing.assert_array_equal(numba_normalize.normalize_parallel(pixels, lo, hi, scale), expected)
+    assert (expected.flat[:1000] == 255).all()
+    assert (expected.flat[1000:2000] == 0).all()
+
+
+def test_multi_frame_shows_middle_frame(tmp_path):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 65535, size=(5, 64, 64), endpoint=True).astype(np.uint16)
+    path = write_dicom(tmp_path / "frames.dcm", pixels, bits_stored=16)
+
+    image = streamlit_app.decode_dicom_file(path)
+    assert image.shape == (64, 64)
+    np.testing.assert_array_equal(
+        image,
+        streamlit_app.normalize_to_uint8(pydicom.dcmread(path).pixel_array[2])
+    )
+
+
+def test_window_spans_full_grey_range():
+    # Truncating float32 products used to map the brightest pixel to 254
+    for value_range in range(1, 5000):
+        pixels = np.linspace(0, value_range, 101).round().astype(np.uint16)
+        image = streamlit_app.normalize_to_uint8(pixels)
+        assert image.min() == 0 and image.max() == 255, value_range